@@ -4,23 +4,75 @@ import rdflib
 from rdflib import Graph, Literal, BNode, Namespace, RDF, URIRef
 from pyshacl import validate
 import argparse
-from .utils import recursiceCheck, built_in_types
+from .utils import recursiceCheck, built_in_types, local_name, create_graph
 import time
 
+# Clark-notation XSD tags, built once instead of formatting them on every lookup
+XS = "{http://www.w3.org/2001/XMLSchema}"
+XS_ELEMENT = XS + "element"
+XS_ATTRIBUTE = XS + "attribute"
+XS_ATTRIBUTE_GROUP = XS + "attributeGroup"
+XS_GROUP = XS + "group"
+XS_COMPLEX_TYPE = XS + "complexType"
+XS_SIMPLE_TYPE = XS + "simpleType"
+XS_SIMPLE_CONTENT = XS + "simpleContent"
+XS_EXTENSION = XS + "extension"
+XS_RESTRICTION = XS + "restriction"
+XS_ENUMERATION = XS + "enumeration"
+XS_SEQUENCE = XS + "sequence"
+XS_CHOICE = XS + "choice"
+XS_ALL = XS + "all"
+XS_UNION = XS + "union"
+XS_ANNOTATION = XS + "annotation"
+XS_APPINFO = XS + "appinfo"
+XS_DOCUMENTATION = XS + "documentation"
+XS_INCLUDE = XS + "include"
+XS_IMPORT = XS + "import"
+
+# SHACL terms, resolved once here instead of through Namespace.__getattr__ for every triple
+SH = Namespace('http://www.w3.org/ns/shacl#')
+SH_NodeShape = SH.NodeShape
+SH_PropertyShape = SH.PropertyShape
+SH_IRI = SH.IRI
+SH_path = SH.path
+SH_name = SH.name
+SH_description = SH.description
+SH_order = SH.order
+SH_node = SH.node
+SH_property = SH.property
+SH_targetClass = SH.targetClass
+SH_targetSubjectsOf = SH.targetSubjectsOf
+SH_nodeKind = SH.nodeKind
+SH_datatype = SH.datatype
+SH_minCount = SH.minCount
+SH_maxCount = SH.maxCount
+SH_minLength = SH.minLength
+SH_maxLength = SH.maxLength
+SH_minInclusive = SH.minInclusive
+SH_maxInclusive = SH.maxInclusive
+SH_minExclusive = SH.minExclusive
+SH_maxExclusive = SH.maxExclusive
+SH_pattern = SH.pattern
+SH_defaultValue = SH.defaultValue
+SH_in = SH["in"]
+SH_or = SH["or"]
+SH_xone = SH["xone"]
+
 
 class XSDtoSHACL:
-    def __init__(self):
+    def __init__(self, store="default"):
         """
         Initialize the XSDtoSHACL class
+        store: rdflib store plugin holding the generated shapes, e.g. "Oxigraph" for a Rust-backed index
         """
         self.shaclNS = rdflib.Namespace('http://www.w3.org/ns/shacl#')
         self.rdfSyntax = rdflib.Namespace('http://www.w3.org/1999/02/22-rdf-syntax-ns#')
         self.xsdNS = rdflib.Namespace('http://www.w3.org/2001/XMLSchema#')
         self.xsdTargetNS = rdflib.Namespace('http://example.com/')
         self.NS = rdflib.Namespace('http://example.com/')
-        self.type_list = built_in_types()
+        self.type_list = frozenset(built_in_types())
         self.xsdNSdict = dict()
-        self.SHACL = Graph()
+        self.SHACL = create_graph(store)
         self.shapes = []
         self.extensionShapes = []
         #self.extension = False
@@ -29,6 +81,9 @@ class XSDtoSHACL:
         self.order_list = []
         self.backUp = None
         self.processed_files = []
+        self.namedTypeCache = dict()
+        self.parentMap = None
+        self.namedNodes = None
 
     def isSimpleComplex(self,xsd_element,xsd_type=None):
         """A function to determine whether the type of element is SimpleType or ComplexType"""
@@ -36,47 +91,61 @@ class XSDtoSHACL:
             xsd_type = xsd_element.get("type")
         if xsd_type == None:
             for child in xsd_element.findall("./"):
-                if "complexType" in child.tag:
+                if child.tag == XS_COMPLEX_TYPE:
                     if child.attrib.get("mixed") == "true":
                         return "mixed"
                     for sub_child in child:
-                        if "simpleContent" in sub_child.tag:
+                        if sub_child.tag == XS_SIMPLE_CONTENT:
                             return "simpleContent"
                     return 1
-                elif "simpleType" in child.tag:
+                elif child.tag == XS_SIMPLE_TYPE:
                     return 0
             return 0
         # elif "xs" in xsd_type or "xsd" in xsd_type or xsd_type in self.type_list:
-        elif xsd_type.split(":")[-1] in self.type_list:
+        elif local_name(xsd_type) in self.type_list:
             return 0 #built-in type
         else:
-            xsd_type = xsd_type.split(":")[-1]
-            elements = self.root.findall(f".//*[@name='{xsd_type}']", self.xsdNSdict)
-            # can't combine both conditions as xmltree doesn't support the full xpath syntax
-            # sometimes, some elements are named after their type, we need to find the element that contains the type definition
-            # that means we need to find the complexType or the simpleType element with that name
-            child = next((e for e in elements if ("complexType" in e.tag or "simpleType" in e.tag)), None)
-
-            if "complexType" in child.tag:
-                if child.attrib.get("mixed") == "true":
-                    return "mixed"
-                for sub_child in child:
-                    if "simpleContent" in sub_child.tag:
-                        return "simpleContent"
-                return 1
-            elif "simpleType" in child.tag:
-                return 0
+            xsd_type = local_name(xsd_type)
+            # The same named type is looked up for every element using it, resolve it only once
+            if xsd_type not in self.namedTypeCache:
+                self.namedTypeCache[xsd_type] = self.resolveNamedType(xsd_type)
+            return self.namedTypeCache[xsd_type]
+
+    def findNamed(self, name):
+        """A function to find the first XSD node declaring the given name"""
+        # Index every name of the merged schema in one pass instead of scanning the whole tree per lookup
+        if self.namedNodes is None:
+            self.namedNodes = dict()
+            for node in self.root.iter():
+                node_name = node.get("name")
+                if node_name is not None:
+                    self.namedNodes.setdefault(node_name, node)
+        return self.namedNodes.get(name)
+
+    def resolveNamedType(self, xsd_type):
+        """A function to determine whether a named type definition is SimpleType or ComplexType"""
+        elements = self.root.findall(f".//*[@name='{xsd_type}']", self.xsdNSdict)
+        # can't combine both conditions as xmltree doesn't support the full xpath syntax
+        # sometimes, some elements are named after their type, we need to find the element that contains the type definition
+        # that means we need to find the complexType or the simpleType element with that name
+        child = next((e for e in elements if e.tag in (XS_COMPLEX_TYPE, XS_SIMPLE_TYPE)), None)
+
+        if child.tag == XS_COMPLEX_TYPE:
+            if child.attrib.get("mixed") == "true":
+                return "mixed"
+            for sub_child in child:
+                if sub_child.tag == XS_SIMPLE_CONTENT:
+                    return "simpleContent"
+            return 1
+        elif child.tag == XS_SIMPLE_TYPE:
+            return 0
         return None
 
-    def find_parent(self, element, parent):
-        for child in parent:
-            if child is element:
-                return parent
-            if len(child) > 0:
-                result = self.find_parent(element, child)
-                if result is not None:
-                    return result
-        return None
+    def find_parent(self, element):
+        # Index every child -> parent pair of the schema in one pass instead of searching the tree again for each lookup
+        if self.parentMap is None:
+            self.parentMap = {child: node for node in self.root.iter() for child in node}
+        return self.parentMap.get(element)
 
     def transRestriction(self,tag,value,subject=None):
         
@@ -84,22 +153,22 @@ class XSDtoSHACL:
             subject = self.shapes[-1]
 
         if "type" in tag or "restriction" in tag:
-            if ((":" in value) and (value.split(":")[1] in self.type_list)):
-                p = self.shaclNS.datatype
-                o = self.xsdNS[value.split(":")[1]]
+            if ((":" in value) and (local_name(value) in self.type_list)):
+                p = SH_datatype
+                o = self.xsdNS[local_name(value)]
                 self.SHACL.add((subject,p,o))
             elif value in self.type_list:
-                p = self.shaclNS.datatype
+                p = SH_datatype
                 o = self.xsdNS[value]
                 self.SHACL.add((subject,p,o))
 
         elif "default" in tag:
-            p = self.shaclNS.defaultValue
+            p = SH_defaultValue
             o = Literal(value)
             self.SHACL.add((subject,p,o))
 
         elif "fixed" in tag:
-            p = self.shaclNS["in"]
+            p = SH_in
             o = Literal(value)
             bn = BNode()
             self.SHACL.add((subject,p,bn))
@@ -107,110 +176,107 @@ class XSDtoSHACL:
             self.SHACL.add((bn,RDF.rest,RDF.nil))
 
         elif "pattern" in tag:
-            p = self.shaclNS.pattern
+            p = SH_pattern
             o = Literal(value)
             self.SHACL.add((subject,p,o))
 
         elif "maxExclusive" in tag:
-            p = self.shaclNS.maxExclusive
+            p = SH_maxExclusive
             o = Literal(value)
             self.SHACL.add((subject,p,o))
 
         elif "minExclusive" in tag:
-            p = self.shaclNS.minExclusive
+            p = SH_minExclusive
             o = Literal(value)
             self.SHACL.add((subject,p,o))
   
         elif "maxInclusive" in tag:
-            p = self.shaclNS.maxInclusive
+            p = SH_maxInclusive
             o = Literal(value)
             self.SHACL.add((subject,p,o))
 
         elif "minInclusive" in tag:
-            p = self.shaclNS.minInclusive
+            p = SH_minInclusive
             o = Literal(value)
             self.SHACL.add((subject,p,o))
 
         elif "length" in tag:        
-            p = self.shaclNS.minLength
+            p = SH_minLength
             o = Literal(int(value))
             self.SHACL.add((subject,p,o))
-            p = self.shaclNS.maxLength
+            p = SH_maxLength
             o = rdflib.Literal(int(value))
             self.SHACL.add((subject,p,o))
 
         elif "minLength" in tag:        
-            p = self.shaclNS.minLength
+            p = SH_minLength
             o = Literal(int(value))
             self.SHACL.add((subject,p,o))
 
         elif "maxLength" in tag:        
-            p = self.shaclNS.maxLength
+            p = SH_maxLength
             o = Literal(int(value))
             self.SHACL.add((subject,p,o))
  
     def transAnnotation(self,xsd_element,subject):
         for child in xsd_element.findall("./"):
             tag = child.tag
-            if "annotation" in tag:
+            if tag == XS_ANNOTATION:
                 for sub_child in child.findall("./"):
                     tag = sub_child.tag
-                    if "appinfo" in tag:
-                        p = self.shaclNS.description
+                    if tag == XS_APPINFO:
+                        p = SH_description
                         o = Literal(sub_child.text)
                         self.SHACL.add((subject,p,o))
-                    elif "documentation" in tag:
-                        p = self.shaclNS.description
+                    elif tag == XS_DOCUMENTATION:
+                        p = SH_description
                         o = Literal(sub_child.text)
                         self.SHACL.add((subject,p,o))
 
     def transEleSimple(self,xsd_element):
         """A function to translate XSD element with simple type and attribute to SHACL property shape"""
         element_name = xsd_element.get("name")
-
-        if "attribute" in xsd_element.tag:
-            subject = self.NS[f'PropertyShape/@{element_name}']
-        else:
-            subject = self.NS[f'PropertyShape/{element_name}']
+        # attributes are marked with "@" in the shape IRI, decide it once from the tag
+        is_attribute = xsd_element.tag == XS_ATTRIBUTE
+        shape_name = f'@{element_name}' if is_attribute else element_name
 
         if self.shapes != []:
             if "NodeShape" in str(self.shapes[-1]):
                 pre_subject_path = self.shapes[-1].split("NodeShape/")[1]
             elif "PropertyShape" in str(self.shapes[-1]):
                 pre_subject_path = self.shapes[-1].split("PropertyShape/")[1]
-            if "attribute" in xsd_element.tag:
-                subject = self.NS[f'PropertyShape/{pre_subject_path}/@{element_name}']
-            else:
-                subject = self.NS[f'PropertyShape/{pre_subject_path}/{element_name}']
+            subject = self.NS[f'PropertyShape/{pre_subject_path}/{shape_name}']
             if subject not in self.choiceShapes:
-                self.SHACL.add((self.shapes[-1],self.shaclNS.property,subject))
+                self.SHACL.add((self.shapes[-1],SH_property,subject))
+        else:
+            subject = self.NS[f'PropertyShape/{shape_name}']
         
         self.transAnnotation(xsd_element,subject)
         self.shapes.append(subject)
-        self.SHACL.add((subject,self.rdfSyntax['type'],self.shaclNS.PropertyShape))
-        self.SHACL.add((subject,self.shaclNS.path,self.xsdTargetNS[element_name]))
-        # self.SHACL.add((subject,self.shaclNS.targetSubjectsOf,self.xsdTargetNS[element_name]))
-        if "attribute" not in xsd_element.tag:
+        self.SHACL.add((subject,RDF.type,SH_PropertyShape))
+        self.SHACL.add((subject,SH_path,self.xsdTargetNS[element_name]))
+        # self.SHACL.add((subject,SH_targetSubjectsOf,self.xsdTargetNS[element_name]))
+        if not is_attribute:
             element_min_occurs = Literal(int(xsd_element.get("minOccurs", "1")))
-            self.SHACL.add((subject,self.shaclNS.minCount,element_min_occurs))
+            self.SHACL.add((subject,SH_minCount,element_min_occurs))
             element_max_occurs = xsd_element.get("maxOccurs", "1")
             if element_max_occurs != "unbounded" and (isinstance(element_max_occurs, int) or isinstance(element_max_occurs, str)):
                 element_max_occurs = Literal(int(element_max_occurs))    
-                self.SHACL.add((subject,self.shaclNS.maxCount,element_max_occurs))          
+                self.SHACL.add((subject,SH_maxCount,element_max_occurs))          
 
         elif xsd_element.get("use") == "required":
-            self.SHACL.add((subject,self.shaclNS.minCount,Literal(1)))
-            self.SHACL.add((subject,self.shaclNS.maxCount,Literal(1)))
+            self.SHACL.add((subject,SH_minCount,Literal(1)))
+            self.SHACL.add((subject,SH_maxCount,Literal(1)))
         elif xsd_element.get("use") == "optional":
-            self.SHACL.add((subject,self.shaclNS.minCount,Literal(0)))
-            self.SHACL.add((subject,self.shaclNS.maxCount,Literal(1)))
+            self.SHACL.add((subject,SH_minCount,Literal(0)))
+            self.SHACL.add((subject,SH_maxCount,Literal(1)))
         elif xsd_element.get("use") == "prohibited":
-            self.SHACL.add((subject,self.shaclNS.minCount,Literal(0)))
-            self.SHACL.add((subject,self.shaclNS.maxCount,Literal(0)))
-        self.SHACL.add((subject,self.shaclNS.name,Literal(element_name)))
+            self.SHACL.add((subject,SH_minCount,Literal(0)))
+            self.SHACL.add((subject,SH_maxCount,Literal(0)))
+        self.SHACL.add((subject,SH_name,Literal(element_name)))
 
         if self.order_list != []:
-            self.SHACL.add((subject,self.shaclNS.order,Literal(self.order_list.pop())))
+            self.SHACL.add((subject,SH_order,Literal(self.order_list.pop())))
 
         for name in xsd_element.attrib:
             self.transRestriction(name, xsd_element.attrib[name])
@@ -219,11 +285,11 @@ class XSDtoSHACL:
         # child type, built-in type or xsd simple type
         if element_type == None:
             return xsd_element
-        elif (":" in element_type) or (element_type.split(":")[-1] in self.type_list): #TODO: check if this is a built-in type
+        elif (":" in element_type) or (local_name(element_type) in self.type_list): #TODO: check if this is a built-in type
             # already translated
             return xsd_element 
         else:
-            next_node = self.root.find(f'.//{{http://www.w3.org/2001/XMLSchema}}simpleType[@name="{element_type}"]')
+            next_node = self.root.find(f'.//{XS_SIMPLE_TYPE}[@name="{element_type}"]')
             # redirect current process to the next root (simple type)
             return next_node 
             
@@ -243,27 +309,27 @@ class XSDtoSHACL:
             subject = self.NS[f'NodeShape/{pre_subject_path}/{element_name}']
             ps_subject = self.NS[f'PropertyShape/{pre_subject_path}/{element_name}']
             if subject not in self.choiceShapes:
-                self.SHACL.add((self.shapes[-1],self.shaclNS.node,subject))
+                self.SHACL.add((self.shapes[-1],SH_node,subject))
 
         self.transAnnotation(xsd_element,subject)
         self.shapes.append(subject)
-        self.SHACL.add((subject,self.rdfSyntax['type'],self.shaclNS.NodeShape))
-        self.SHACL.add((subject,self.shaclNS.name,Literal(element_name)))
+        self.SHACL.add((subject,RDF.type,SH_NodeShape))
+        self.SHACL.add((subject,SH_name,Literal(element_name)))
         
-        self.SHACL.add((subject,self.shaclNS.nodeKind,self.shaclNS.IRI))
-        self.SHACL.add((subject,self.shaclNS.targetClass,self.xsdTargetNS[element_name]))
+        self.SHACL.add((subject,SH_nodeKind,SH_IRI))
+        self.SHACL.add((subject,SH_targetClass,self.xsdTargetNS[element_name]))
 
         """Uncomment this if you want to add one more Property Shape for complex element which will be translated to Node Shape"""
-        # self.SHACL.add((subject,self.shaclNS.property,ps_subject))
-        # self.SHACL.add((ps_subject,self.rdfSyntax['type'],self.shaclNS.PropertyShape))
-        # self.SHACL.add((ps_subject,self.shaclNS.name,Literal(element_name)))
-        # self.SHACL.add((ps_subject,self.shaclNS.path,self.xsdTargetNS[element_name]))
+        # self.SHACL.add((subject,SH_property,ps_subject))
+        # self.SHACL.add((ps_subject,RDF.type,SH_PropertyShape))
+        # self.SHACL.add((ps_subject,SH_name,Literal(element_name)))
+        # self.SHACL.add((ps_subject,SH_path,self.xsdTargetNS[element_name]))
         # element_min_occurs = Literal(int(xsd_element.get("minOccurs", "1")))
-        # self.SHACL.add((ps_subject,self.shaclNS.minCount,element_min_occurs))
+        # self.SHACL.add((ps_subject,SH_minCount,element_min_occurs))
         # element_max_occurs = xsd_element.get("maxOccurs", "1")
         # if element_max_occurs != "unbounded" and (isinstance(element_max_occurs, int) or isinstance(element_max_occurs, str)):
         #     element_max_occurs = Literal(int(element_max_occurs))    
-        #     self.SHACL.add((ps_subject,self.shaclNS.maxCount,element_max_occurs))
+        #     self.SHACL.add((ps_subject,SH_maxCount,element_max_occurs))
     
 
         for name in xsd_element.attrib:
@@ -272,7 +338,7 @@ class XSDtoSHACL:
 
         element_type = xsd_element.get("type")
         if element_type != None:
-            self.SHACL.add((subject,self.shaclNS.node,self.NS[f'NodeShape/{element_type}'])) #Will be translated later
+            self.SHACL.add((subject,SH_node,self.NS[f'NodeShape/{element_type}'])) #Will be translated later
 
         return xsd_element
 
@@ -290,30 +356,30 @@ class XSDtoSHACL:
             subject = self.NS[f'NodeShape/{pre_subject_path}/{element_name}']
             ps_subject = self.NS[f'PropertyShape/{pre_subject_path}/{element_name}']
             if subject not in self.choiceShapes:
-                self.SHACL.add((self.shapes[-1],self.shaclNS.node,subject))
+                self.SHACL.add((self.shapes[-1],SH_node,subject))
 
         self.transAnnotation(xsd_element,subject)
         self.shapes.append(subject)
         # self.shapes.append(ps_subject)
         # self.simpleContent = subject
         #self.extension = True
-        self.SHACL.add((subject,self.rdfSyntax['type'],self.shaclNS.NodeShape))
-        self.SHACL.add((subject,self.shaclNS.name,Literal(element_name)))
+        self.SHACL.add((subject,RDF.type,SH_NodeShape))
+        self.SHACL.add((subject,SH_name,Literal(element_name)))
         
-        self.SHACL.add((subject,self.shaclNS.nodeKind,self.shaclNS.IRI))
-        self.SHACL.add((subject,self.shaclNS.targetClass,self.xsdTargetNS[element_name]))
+        self.SHACL.add((subject,SH_nodeKind,SH_IRI))
+        self.SHACL.add((subject,SH_targetClass,self.xsdTargetNS[element_name]))
 
         # Add one more property shape
-        self.SHACL.add((subject,self.shaclNS.property,ps_subject))
-        self.SHACL.add((ps_subject,self.rdfSyntax['type'],self.shaclNS.PropertyShape))
-        self.SHACL.add((ps_subject,self.shaclNS.name,Literal(element_name)))
-        self.SHACL.add((ps_subject,self.shaclNS.path,self.xsdTargetNS[element_name]))
+        self.SHACL.add((subject,SH_property,ps_subject))
+        self.SHACL.add((ps_subject,RDF.type,SH_PropertyShape))
+        self.SHACL.add((ps_subject,SH_name,Literal(element_name)))
+        self.SHACL.add((ps_subject,SH_path,self.xsdTargetNS[element_name]))
         element_min_occurs = Literal(int(xsd_element.get("minOccurs", "1")))
-        self.SHACL.add((ps_subject,self.shaclNS.minCount,element_min_occurs))
+        self.SHACL.add((ps_subject,SH_minCount,element_min_occurs))
         element_max_occurs = xsd_element.get("maxOccurs", "1")
         if element_max_occurs != "unbounded" and (isinstance(element_max_occurs, int) or isinstance(element_max_occurs, str)):
             element_max_occurs = Literal(int(element_max_occurs))    
-            self.SHACL.add((ps_subject,self.shaclNS.maxCount,element_max_occurs))
+            self.SHACL.add((ps_subject,SH_maxCount,element_max_occurs))
     
 
         for name in xsd_element.attrib:
@@ -321,40 +387,40 @@ class XSDtoSHACL:
                 self.transRestriction(name, xsd_element.attrib[name], ps_subject)
         element_type = xsd_element.get("type")
         if element_type == None:
-            for i in xsd_element.findall(f".//{{http://www.w3.org/2001/XMLSchema}}complexType/{{http://www.w3.org/2001/XMLSchema}}simpleContent/{{http://www.w3.org/2001/XMLSchema}}extension"):
+            for i in xsd_element.findall(f".//{XS_COMPLEX_TYPE}/{XS_SIMPLE_CONTENT}/{XS_EXTENSION}"):
                 type_name = i.get("base")
-                if type_name.split(":")[-1] in self.type_list:
-                    self.SHACL.add((ps_subject,self.shaclNS.datatype,self.xsdNS[type_name.split(":")[1]]))
+                if local_name(type_name) in self.type_list:
+                    self.SHACL.add((ps_subject,SH_datatype,self.xsdNS[local_name(type_name)]))
                 else:
-                    extension_node = self.root.find(f".//*[@name='{type_name}']")
+                    extension_node = self.findNamed(type_name)
                     extension_node_type = self.isSimpleComplex(extension_node)
                     if extension_node_type == 0:
-                        next_node = self.root.find(f'.//{{http://www.w3.org/2001/XMLSchema}}simpleType[@name="{type_name}"]')
+                        next_node = self.root.find(f'.//{XS_SIMPLE_TYPE}[@name="{type_name}"]')
                         # redirect current process to the next root (simple type)
                         return next_node 
                     elif extension_node_type == 1:
-                        self.SHACL.add((ps_subject,self.shaclNS.node,self.NS[f'NodeShape/{type_name}']))
+                        self.SHACL.add((ps_subject,SH_node,self.NS[f'NodeShape/{type_name}']))
             return xsd_element
         else:
-            self.SHACL.add((subject,self.shaclNS.node,self.NS[f'NodeShape/{element_type}'])) #Will be translated later
+            self.SHACL.add((subject,SH_node,self.NS[f'NodeShape/{element_type}'])) #Will be translated later
   
-            for i in self.root.findall(f".//*[@name='{element_type}']/{{http://www.w3.org/2001/XMLSchema}}simpleContent/{{http://www.w3.org/2001/XMLSchema}}restriction"):
+            for i in self.root.findall(f".//*[@name='{element_type}']/{XS_SIMPLE_CONTENT}/{XS_RESTRICTION}"):
                 type_name = i.get("base")
-                if type_name.split(":")[-1] in self.type_list:
-                    self.SHACL.add((ps_subject,self.shaclNS.datatype,self.xsdNS[type_name.split(":")[1]]))
-            for i in self.root.findall(f".//*[@name='{element_type}']/{{http://www.w3.org/2001/XMLSchema}}simpleContent/{{http://www.w3.org/2001/XMLSchema}}extension"):
+                if local_name(type_name) in self.type_list:
+                    self.SHACL.add((ps_subject,SH_datatype,self.xsdNS[local_name(type_name)]))
+            for i in self.root.findall(f".//*[@name='{element_type}']/{XS_SIMPLE_CONTENT}/{XS_EXTENSION}"):
                 type_name = i.get("base")
-                if type_name.split(":")[-1] in self.type_list:
-                    self.SHACL.add((ps_subject,self.shaclNS.datatype,self.xsdNS[type_name.split(":")[-1]]))
+                if local_name(type_name) in self.type_list:
+                    self.SHACL.add((ps_subject,SH_datatype,self.xsdNS[local_name(type_name)]))
                 else:
-                    extension_node = self.root.find(f".//*[@name='{type_name}']")
+                    extension_node = self.findNamed(type_name)
                     extension_node_type = self.isSimpleComplex(extension_node)
                     if extension_node_type == 0:
                         next_node = extension_node
                         # redirect current process to the next root (simple type)
                         return next_node 
                     elif extension_node_type == 1:
-                        self.SHACL.add((ps_subject,self.shaclNS.node,self.NS[f'NodeShape/{type_name}']))
+                        self.SHACL.add((ps_subject,SH_node,self.NS[f'NodeShape/{type_name}']))
 
             return xsd_element
         return xsd_element
@@ -371,12 +437,12 @@ class XSDtoSHACL:
             subject = subject = self.NS[f'NodeShape/{pre_subject_path}/{element_name}']
             # To solve that it is the child node of any element
             if subject not in self.choiceShapes:
-                self.SHACL.add((self.shapes[-1],self.shaclNS.node,subject))
+                self.SHACL.add((self.shapes[-1],SH_node,subject))
 
         self.transAnnotation(xsd_element,subject)
         self.shapes.append(subject)
-        self.SHACL.add((subject,self.rdfSyntax['type'],self.shaclNS.NodeShape))
-        self.SHACL.add((subject,self.shaclNS.name,Literal(element_name)))
+        self.SHACL.add((subject,RDF.type,SH_NodeShape))
+        self.SHACL.add((subject,SH_name,Literal(element_name)))
         # complex type does not have target, element can
 
         for name in xsd_element.attrib:
@@ -391,8 +457,8 @@ class XSDtoSHACL:
             element_name = xsd_element.get("id")
         subject = self.NS[f'NodeShape/{element_name}']
         self.shapes.append(subject)
-        self.SHACL.add((subject,self.rdfSyntax['type'],self.shaclNS.NodeShape))
-        self.SHACL.add((subject,self.shaclNS.name,Literal(element_name)))
+        self.SHACL.add((subject,RDF.type,SH_NodeShape))
+        self.SHACL.add((subject,SH_name,Literal(element_name)))
         # complex type does not have target, element can
 
         for name in xsd_element.attrib:
@@ -406,34 +472,34 @@ class XSDtoSHACL:
         # xsd_type = xsd_element.get("type")
         if element_name in self.extensionShapes:
             return xsd_element
-        elif element_name.split(":")[-1] in self.type_list:
+        elif local_name(element_name) in self.type_list:
             # if "PropertyShape" in str(self.shapes[-1]):
             #     subject = self.shapes[-1]
             # elif "NodeShape" in str(self.shapes[-1]):
             #     subject = URIRef(str(self.shapes[-1]).replace("NodeShape","PropertyShape"))
             if "PropertyShape" in str(self.shapes[-1]):
-                self.SHACL.add((self.shapes[-1],self.shaclNS.datatype,self.xsdNS[element_name.split(":")[1]]))
+                self.SHACL.add((self.shapes[-1],SH_datatype,self.xsdNS[local_name(element_name)]))
             return xsd_element
         else:
             self.extensionShapes.append(element_name)
-            sub_node = self.root.find(f'.//*[@name="{element_name}"]',self.xsdNSdict)
+            sub_node = self.findNamed(element_name)
             element_type = self.isSimpleComplex(sub_node, element_name)
             subject = self.shapes[-1]
 
             if element_type == 1:
                 # complexType will be translated seperatly so we just need to add the node shape
-                self.SHACL.add((subject,self.shaclNS.node,self.NS[f'NodeShape/{element_name}'])) 
+                self.SHACL.add((subject,SH_node,self.NS[f'NodeShape/{element_name}'])) 
                 # self.extensionShape = False
                 return xsd_element
 
             # elif element_type == 0:
             #     # simpleType will not be translated seperatly so we need to redirect it here
             #     next_node = sub_node
-            #     self.SHACL.add((subject,self.shaclNS.property,self.NS[f'PropertyShape/{element_name}'])) 
+            #     self.SHACL.add((subject,SH_property,self.NS[f'PropertyShape/{element_name}'])) 
             #     subject = self.NS[f'PropertyShape/{element_name}']
-            #     self.SHACL.add((subject,self.rdfSyntax['type'],self.shaclNS.PropertyShape))
-            #     self.SHACL.add((subject,self.shaclNS.name,Literal(element_name)))
-            #     self.SHACL.add((subject,self.shaclNS.path,self.xsdTargetNS[element_name]))
+            #     self.SHACL.add((subject,RDF.type,SH_PropertyShape))
+            #     self.SHACL.add((subject,SH_name,Literal(element_name)))
+            #     self.SHACL.add((subject,SH_path,self.xsdTargetNS[element_name]))
 
             #     self.shapes.append(subject)
             #     self.backUp = xsd_element
@@ -448,14 +514,14 @@ class XSDtoSHACL:
     def transEnumeration(self, xsd_element):
         values = []
         subject = self.shapes[-1]
-        parent_element = self.find_parent(xsd_element, self.root)
+        parent_element = self.find_parent(xsd_element)
 
         if parent_element not in self.enumerationShapes:
             self.enumerationShapes.append(parent_element)
         else:
             return xsd_element
 
-        for e in parent_element.findall('.//xs:enumeration',namespaces={"xs": "http://www.w3.org/2001/XMLSchema"}):
+        for e in parent_element.findall(f'.//{XS_ENUMERATION}'):
             if e.get("value"):
                 values.append(e.get("value"))
 
@@ -463,7 +529,7 @@ class XSDtoSHACL:
             return xsd_element
         else:
             current_BN = BNode()
-            self.SHACL.add((subject, self.shaclNS["in"], current_BN))
+            self.SHACL.add((subject, SH_in, current_BN))
             for index in range(len(values))[0:-1]:
                 self.SHACL.add((current_BN, RDF.first, Literal(values[index]))) 
                 next_BN = BNode()
@@ -482,14 +548,14 @@ class XSDtoSHACL:
             memberTypes = xsd_element.get("memberTypes").split(" ")
 
             current_BN = BNode()
-            self.SHACL.add((subject, self.shaclNS["or"], current_BN))
+            self.SHACL.add((subject, SH_or, current_BN))
 
             for index in range(len(memberTypes)):
                 memberType = memberTypes[index]
-                if (":" in memberType) and (memberType.split(":")[-1] in self.type_list):
+                if (":" in memberType) and (local_name(memberType) in self.type_list):
                     shape_BN = BNode()
                     self.SHACL.add((current_BN, RDF.first, shape_BN)) 
-                    self.SHACL.add((shape_BN, self.shaclNS.datatype, self.xsdNS[memberType.split(":")[1]])) 
+                    self.SHACL.add((shape_BN, SH_datatype, self.xsdNS[local_name(memberType)])) 
                     next_BN = BNode()
                     if index == len(memberTypes)-1:
                         self.SHACL.add((current_BN, RDF.rest, RDF.nil)) 
@@ -497,7 +563,7 @@ class XSDtoSHACL:
                         self.SHACL.add((current_BN, RDF.rest, next_BN))
                     current_BN = next_BN
                 else:
-                    sub_node = self.root.find(f'.//*[@name="{memberType}"]',self.xsdNSdict)
+                    sub_node = self.findNamed(memberType)
                     element_type = self.isSimpleComplex(sub_node, memberType)
                     if element_type == 1:
                         self.SHACL.add((current_BN, RDF.first, self.NS[f'NodeShape/{memberType}'])) 
@@ -523,14 +589,14 @@ class XSDtoSHACL:
             memberTypes = xsd_element.get("memberTypes").split(" ")
 
             current_BN = BNode()
-            self.SHACL.add((subject, self.shaclNS["or"], current_BN))
+            self.SHACL.add((subject, SH_or, current_BN))
 
             for index in range(len(memberTypes)):
                 memberType = memberTypes[index]
-                if (":" in memberType) and (memberType.split(":")[-1] in self.type_list):
+                if (":" in memberType) and (local_name(memberType) in self.type_list):
                     shape_BN = BNode()
                     self.SHACL.add((current_BN, RDF.first, shape_BN)) 
-                    self.SHACL.add((shape_BN, self.shaclNS.datatype, self.xsdNS[memberType.split(":")[1]])) 
+                    self.SHACL.add((shape_BN, SH_datatype, self.xsdNS[local_name(memberType)])) 
                     next_BN = BNode()
                     if index == len(memberTypes)-1:
                         self.SHACL.add((current_BN, RDF.rest, RDF.nil)) 
@@ -538,7 +604,7 @@ class XSDtoSHACL:
                         self.SHACL.add((current_BN, RDF.rest, next_BN))
                     current_BN = next_BN
                 else:
-                    sub_node = self.root.find(f'.//*[@name="{memberType}"]',self.xsdNSdict)
+                    sub_node = self.findNamed(memberType)
                     element_type = self.isSimpleComplex(sub_node, memberType)
                     if element_type == 1:
                         self.SHACL.add((current_BN, RDF.first, self.NS[f'NodeShape/{memberType}'])) 
@@ -580,7 +646,7 @@ class XSDtoSHACL:
                     current_BN = next_BN         
         else:
             current_BN = BNode()
-            self.SHACL.add((subject, self.shaclNS["or"], current_BN))
+            self.SHACL.add((subject, SH_or, current_BN))
             index = 0
             for sub_node in xsd_element:
                 index += 1
@@ -617,7 +683,7 @@ class XSDtoSHACL:
 
         for child in xsd_element.findall("./"):
             tag = child.tag
-            if "element" in tag:
+            if tag == XS_ELEMENT:
                 element_type = self.isSimpleComplex(child)
                 if element_type == 0:
                     # values.append(self.NS[f'PropertyShape/{child.get("name")}'])
@@ -628,7 +694,7 @@ class XSDtoSHACL:
                     temp = self.NS[f'NodeShape/{pre_subject_path}/{child.get("name")}']
                     values.append(temp)
                 self.choiceShapes.append(temp)
-            elif "group" in tag:
+            elif tag == XS_GROUP:
                 temp = child.get("ref")
                 if temp == None:
                     temp = child.get("id")
@@ -642,7 +708,7 @@ class XSDtoSHACL:
             return xsd_element
         else:
             current_BN = BNode()
-            self.SHACL.add((subject, self.shaclNS["xone"], current_BN))
+            self.SHACL.add((subject, SH_xone, current_BN))
             for index in range(len(values))[0:-1]:
                 self.SHACL.add((current_BN, RDF.first, URIRef(values[index]))) 
                 next_BN = BNode()
@@ -659,22 +725,22 @@ class XSDtoSHACL:
             # Translate current node and associate this SHACL term/shape with its corresponding SHACL shape
             tag = child.tag
             next_node = child
-            if ("element" in tag) or (("attribute" in tag) and ("attributeGroup" not in tag)):
+            if (tag == XS_ELEMENT) or (tag == XS_ATTRIBUTE):
                 if child.get("ref"):
                     ref = child.get("ref")
                     if ":" in ref:
-                        ref = ref.split(":")[-1]
-                    ref_node = self.root.find(f".//*[@name='{ref}']")
+                        ref = local_name(ref)
+                    ref_node = self.findNamed(ref)
                     if ref_node != None:
                         element_type = self.isSimpleComplex(ref_node)
                         if element_type == 0:                            
-                            if "attribute" in ref_node.tag:
+                            if ref_node.tag == XS_ATTRIBUTE:
                                 object = self.NS[f'PropertyShape/@{ref}']
                             else:
                                 object = self.NS[f'PropertyShape/{ref}']
-                            self.SHACL.add((self.shapes[-1],self.shaclNS.property,object))
+                            self.SHACL.add((self.shapes[-1],SH_property,object))
                         elif element_type == 1:
-                            self.SHACL.add((self.shapes[-1],self.shaclNS.node,self.NS[f'NodeShape/{ref}']))
+                            self.SHACL.add((self.shapes[-1],SH_node,self.NS[f'NodeShape/{ref}']))
                 else:
                     element_type = self.isSimpleComplex(child)
                     if element_type == 0:
@@ -683,51 +749,51 @@ class XSDtoSHACL:
                         next_node = self.transEleComplex(child)
                     elif element_type == "simpleContent" or element_type == "mixed":
                         next_node = self.transEleComplexSimpleContent(child)
-            elif ("simpleType" in tag) and (self.shapes == []):
+            elif (tag == XS_SIMPLE_TYPE) and (self.shapes == []):
                 continue
-            elif ("extension" in tag):
+            elif (tag == XS_EXTENSION):
                 next_node = self.transExtension(child)
-            elif ("complexType" in tag) and (child.get("name")):
+            elif (tag == XS_COMPLEX_TYPE) and (child.get("name")):
                 next_node = self.transComplexType(child)
-            elif ("attributeGroup" in tag):
+            elif (tag == XS_ATTRIBUTE_GROUP):
                 if child.get("ref"):
                     # next_node = self.root.find(f".//*[@name='{child.get('ref')}']")
-                    self.SHACL.add((self.shapes[-1],self.shaclNS.node,self.NS[f'NodeShape/{child.get("ref")}']))
+                    self.SHACL.add((self.shapes[-1],SH_node,self.NS[f'NodeShape/{child.get("ref")}']))
                 else:
                     next_node = self.transComplexType(child)
-            elif ("group" in tag):
+            elif (tag == XS_GROUP):
                 ref = child.get("ref")
                 if ref:
                     if ref in self.choiceShapes:
                         pass
                     else:
-                        self.SHACL.add((self.shapes[-1],self.shaclNS.node,self.NS[f'NodeShape/{ref}']))
+                        self.SHACL.add((self.shapes[-1],SH_node,self.NS[f'NodeShape/{ref}']))
                     # else:
                     #     next_node = self.root.find(f".//*[@id='{ref}']")
                     #     if next_node == None:
                     #         next_node = self.root.find(f".//*[@name='{ref}']")
                 else:
                     next_node = self.transGroup(child)
-            elif ("complexType" in tag) or ("simpleType" in tag): 
+            elif (tag == XS_COMPLEX_TYPE) or (tag == XS_SIMPLE_TYPE): 
                 #will be translated in the next iteration
                 pass
-            elif ("restriction" in tag):
+            elif (tag == XS_RESTRICTION):
                 value = child.get("base")
                 self.transRestriction(tag,value)
-            elif ("enumeration" in tag):
+            elif (tag == XS_ENUMERATION):
                 self.transEnumeration(child)
-            elif ("sequence" in tag):
+            elif (tag == XS_SEQUENCE):
                 pass
                 # self.order_list = list(reversed(range(len(child.findall("./")))))
-            elif ("choice" in tag):
+            elif (tag == XS_CHOICE):
                 self.transChoice(child)
-            elif ("all" in tag):
+            elif (tag == XS_ALL):
                 pass
-            elif ("union" in tag):
+            elif (tag == XS_UNION):
                 # memberTypes = child.get("memberTypes").split(" ")
                 self.transUnion(child)
                 continue
-            elif ("appinfo" in tag) or ("documentation" in tag) or ("annotation" in tag):
+            elif (tag == XS_APPINFO) or (tag == XS_DOCUMENTATION) or (tag == XS_ANNOTATION):
                 continue
             else:
                 value = child.get("value")
@@ -738,7 +804,7 @@ class XSDtoSHACL:
             # removed: or self.extension
             # an <xs:extension> is always inside another case that will return true below
             # there is a proven risk (taf_cat_complexe.xsd from the TAF_TSI) that the self.extension=true will result in an unwanted 2x pop()
-            if (("element" in tag) and (child.get("name"))) or (("attribute" in tag) and ("attributeGroup" not in tag) and not child.get("ref")) or (("complexType" in tag) and (child.get("name"))) or (("attributeGroup" in tag) and (child.get("name"))) or (("group" in tag) and (child.get("name") or child.get("id"))):
+            if ((tag == XS_ELEMENT) and (child.get("name"))) or ((tag == XS_ATTRIBUTE) and not child.get("ref")) or ((tag == XS_COMPLEX_TYPE) and (child.get("name"))) or ((tag == XS_ATTRIBUTE_GROUP) and (child.get("name"))) or ((tag == XS_GROUP) and (child.get("name") or child.get("id"))):
                 self.shapes.pop()
                 #self.extension = False
                 # if (self.shapes!=[]) and (self.simpleContent == self.shapes[-1]):
@@ -765,7 +831,7 @@ class XSDtoSHACL:
     def parseXSD(self, ref_root):
 
         # Process xs:include
-        for include_import_elem in ref_root.findall(".//xs:include", namespaces={"xs": "http://www.w3.org/2001/XMLSchema"}):
+        for include_import_elem in ref_root.findall(f".//{XS_INCLUDE}"):
             self.root.remove(include_import_elem)
             included_imported_xsd_path = include_import_elem.get("schemaLocation")
             if included_imported_xsd_path and included_imported_xsd_path not in self.processed_files:
@@ -783,7 +849,7 @@ class XSDtoSHACL:
                 self.parseXSD(next_ref_root)
 
         # Process xs:import
-        for include_import_elem in ref_root.findall(".//xs:import", namespaces={"xs": "http://www.w3.org/2001/XMLSchema"}):
+        for include_import_elem in ref_root.findall(f".//{XS_IMPORT}"):
             self.root.remove(include_import_elem)
             included_imported_xsd_path = include_import_elem.get("schemaLocation")
             if included_imported_xsd_path and included_imported_xsd_path not in self.processed_files:
@@ -806,6 +872,9 @@ class XSDtoSHACL:
         self.BASE_PATH = os.path.dirname(xsd_file)
         self.xsdTree = ET.parse(xsd_file)
         self.root = self.xsdTree.getroot()
+        self.namedTypeCache = dict()
+        self.parentMap = None
+        self.namedNodes = None
 
         recursiceCheck(self.root)
 
@@ -1,58 +1,282 @@
-import argparse, os
-from .XSDtoSHACL import XSDtoSHACL
-from .post_adjustment.adjustment_RINF import Adjustment_RINF
-from .post_adjustment.adjustment_TED import Adjustment_TED
+import argparse, importlib, json, os, stat
+from contextlib import contextmanager
 
+LISTING_CACHE = ".xsd2shacl_listing.json"
+# Post-adjustment classes as "module:class" under post_adjustment, selected by a token of the RML path
+ADJUSTERS = {"TED": "adjustment_TED:Adjustment_TED",
+             "RINF": "adjustment_RINF:Adjustment_RINF"}
+# File extension of the post-adjusted shapes for each --FORMAT
+FORMAT_EXTENSIONS = {"turtle": "ttl", "nt": "nt", "jelly": "jelly"}
+# Buffer of the post-adjusted shapes file, coalescing the many small writes of the serializers
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+# Estimated size of one serialized triple, used to preallocate the post-adjusted shapes file
+BYTES_PER_TRIPLE = 128
 
-def define_args():
+_PARSER = None
+# The subcommand parsers, reporting errors with their own usage
+_SUBPARSERS = {}
+
+
+def positive_int(value):
+    """
+    Argument type of the counts that must be at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
+def _get_parser():
+    """
+    Build the argument parser once per process, repeated in-process calls only parse their argv
+    """
+    global _PARSER
+    if _PARSER is not None:
+        return _PARSER
     parser = argparse.ArgumentParser(description='Translate XSD to SHACL')
+    # The store and profile options are shared by both commands
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--PROFILE", type=str, help="Write a cProfile trace of the run to this path, readable with pstats or gprof2dot -f pstats")
+    common.add_argument("--STORE", type=str, default="default", help="The rdflib store plugin holding the SHACL shapes, e.g. Oxigraph (requires oxrdflib), the default is the in-memory store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
 
-    parser.add_argument("--XSD_FILE","-x", type=str, help="XSD file to be converted into SHACL shapes.")
-    parser.add_argument("--SHACL_OUTPUT_PATH", "-s", type=str, help="The path used to store the generated SHACL shapes, the default is XSD_FILE.shape.ttl")
+    convert = subparsers.add_parser("convert", parents=[common], help="Translate XSD to SHACL shapes")
+    convert.add_argument("--XSD_FILE","-x", type=str, required=True, help="XSD file, or directory of XSD files, to be converted into SHACL shapes.")
+    convert.add_argument("--SHACL_OUTPUT_PATH", "-s", type=str, help="The path used to store the generated SHACL shapes (a directory when XSD_FILE is a directory), the default is XSD_FILE.shape.ttl")
+    convert.add_argument("--WORKERS", "-w", type=positive_int, default=os.cpu_count() or 1, help="The number of processes converting the XSD files of a directory in parallel, the default is the number of CPUs")
 
-    parser.add_argument("--SHACL_INPUT_PATH", "-i", type=str, help="SHACL file to be post-adjusted.")
-    parser.add_argument("--RML_PATH", "-r", type=str, help="The RML file or dictionary used to conduct post-adjustment")
-    parser.add_argument("--ADJUSTED_PATH", "-a", type=str, help="The path used to store the post-adjusted SHACL shapes, the default is SHACL_FILE.RML_FILENAME.adjustment.ttl")
+    adjust = subparsers.add_parser("adjust", parents=[common], help="Post-adjust SHACL shapes with RML mappings")
+    adjust.add_argument("--SHACL_INPUT_PATH", "-i", type=str, required=True, help="SHACL file to be post-adjusted, in Turtle or in Jelly (.jelly, requires pyjelly).")
+    adjust.add_argument("--RML_PATH", "-r", type=str, required=True, help="The RML file or dictionary used to conduct post-adjustment")
+    adjust.add_argument("--ADJUSTED_PATH", "-a", type=str, help="The path used to store the post-adjusted SHACL shapes, the default is SHACL_INPUT_PATH.RML_FILENAME.adjustment.ttl (or .nt/.jelly following --FORMAT)")
+    output_format = adjust.add_mutually_exclusive_group()
+    output_format.add_argument("--FORMAT", "-f", type=str, choices=list(FORMAT_EXTENSIONS), default="turtle", help="The RDF format used to store the post-adjusted SHACL shapes, jelly requires pyjelly, the default is turtle")
+    output_format.add_argument("--FAST_OUTPUT", action="store_const", dest="FORMAT", const="nt", help="Same as --FORMAT nt, for shapes only read by other tools: N-Triples are not meant for humans, but about twice as fast to write and to load again")
+    output_format.add_argument("--STREAM", action="store_const", dest="FORMAT", const="nt", help="Same as --FORMAT nt, kept for existing scripts")
+    adjust.add_argument("--BATCH_SIZE", type=positive_int, default=32, help="The number of triples maps applied to the SHACL shapes at a time, the default is 32. Each mapping file (RINF) or group of mapping files (TED) is parsed whole first, so it only sets how often the shapes are adjusted, not the result")
+    adjust.add_argument("--CACHE_LISTING", action="store_true", help="Cache the listing of an RML directory in RML_PATH/.xsd2shacl_listing.json and reuse it while the directory is unchanged")
 
-    return parser.parse_args()
+    _SUBPARSERS.update(convert=convert, adjust=adjust)
+    _PARSER = parser
+    return parser
 
-if __name__ == "__main__":
+def define_args(argv=None):
+    return _get_parser().parse_args(argv)
 
-    args = define_args()
+def _command_error(command, message):
+    """
+    Exit with the usage of the failing subcommand, as argparse does for its own errors
+    """
+    _get_parser()
+    _SUBPARSERS[command].error(message)
 
-    xsd2shacl = XSDtoSHACL()
+def convert_xsd(xsd_file, shacl_file=None, store="default"):
+    """
+    Convert one XSD file with its own converter, as XSDtoSHACL keeps the state of the schema it translates
+    """
+    from .XSDtoSHACL import XSDtoSHACL
+    XSDtoSHACL(store).evaluate_file(xsd_file, shacl_file)
 
-    if args.XSD_FILE and args.SHACL_OUTPUT_PATH:
-        xsd2shacl.evaluate_file(args.XSD_FILE, args.SHACL_OUTPUT_PATH)
+def list_mapping_files(rml_dir, cache=False):
+    """
+    List the RML mapping files of a directory, optionally reusing the listing cached in the directory
+    as long as the directory has not been modified since.
+    """
+    listing_path = os.path.join(rml_dir, LISTING_CACHE)
+    if cache:
+        try:
+            # The cache file carries the directory mtime as its own mtime
+            if os.stat(listing_path).st_mtime_ns == os.stat(rml_dir).st_mtime_ns:
+                with open(listing_path) as f:
+                    names = json.load(f)["names"]
+                # File names are cached, so the listing holds whatever the working directory or form of RML_PATH
+                return [os.path.join(rml_dir, name) for name in names]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
 
-    elif args.XSD_FILE:
-        xsd2shacl.evaluate_file(args.XSD_FILE)
+    # scandir reuses the directory entry type, and only mapping files are handed to the adjuster
+    with os.scandir(rml_dir) as it:
+        names = sorted(entry.name for entry in it
+                       if entry.is_file()
+                       and entry.name.endswith(".ttl")
+                       and not entry.name.startswith("."))
 
-    elif args.SHACL_INPUT_PATH:
-        if args.ADJUSTED_PATH:
-            destination_path = args.ADJUSTED_PATH
-        else:
-            if args.RML_PATH.endswith(".ttl"):
-                destination_path = args.SHACL_FILE + "." + args.RML_PATH.split(".ttl")[0].split("\\")[-1].split("/")[
-                    -1] + ".adjustment.ttl"
-            else:
-                destination_path = args.SHACL_FILE + "." + args.RML_PATH.split("\\")[-1] + ".adjustment.ttl"
-
-        if "TED" in args.RML_PATH:
-            adj = Adjustment_TED()
-        else:
-            adj = Adjustment_RINF()
+    if cache:
+        # Moving the cache file in place bumps the directory mtime, which is then stamped on the cache file
+        # (changing a file's times leaves the directory untouched)
+        tmp_path = listing_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"names": names}, f)
+            os.replace(tmp_path, listing_path)
+            mtime = os.stat(rml_dir).st_mtime_ns
+            os.utime(listing_path, ns=(mtime, mtime))
+        except OSError as e:
+            print("Cannot cache the listing of " + rml_dir + ": " + str(e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return [os.path.join(rml_dir, name) for name in names]
+
+def load_adjuster(rml_path):
+    """
+    Import only the post-adjustment class matching the RML path, looking at the file or directory name first
+    and then at the whole path, RINF being the default
+    """
+    name = os.path.basename(rml_path.rstrip("/\\"))
+    token = next((k for k in ADJUSTERS if k in name), None) or next((k for k in ADJUSTERS if k in rml_path), "RINF")
+    module, cls = ADJUSTERS[token].split(":")
+    return getattr(importlib.import_module(f".post_adjustment.{module}", __package__), cls)
 
-        print("##### Start load SHACL shape")
+@contextmanager
+def open_destination(destination_path, graph):
+    """
+    Open the file of a serialized graph with its estimated size preallocated where the platform supports it,
+    the overallocation is cut off once the graph is written and a file created here is removed if writing fails.
+    Pipes, devices and other non-regular destinations are written as they are.
+    """
+    created = not os.path.lexists(destination_path)
+    f = open(destination_path, "wb", buffering=WRITE_BUFFER_SIZE)
+    regular = stat.S_ISREG(os.fstat(f.fileno()).st_mode)
+    try:
+        if regular and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, len(graph) * BYTES_PER_TRIPLE)
+            except OSError:
+                pass
+        yield f
+        if regular:
+            f.truncate()
+    except BaseException:
+        # A partial file would keep its preallocated size padded with NUL bytes,
+        # a file that already existed is only cut off at what was written
+        if regular and not created:
+            try:
+                f.truncate()
+            except OSError:
+                pass
+        f.close()
+        if regular and created:
+            os.remove(destination_path)
+        raise
+    finally:
+        f.close()
 
-        if args.RML_PATH.endswith(".ttl"):
-            rml_path = args.RML_PATH
+def prime_qnames(graph):
+    """
+    Bind the vocabularies of the adjusted shapes and compute the qnames of their predicates once,
+    so the Turtle serializer finds them in the namespace manager cache instead of resolving them per triple
+    """
+    from rdflib.namespace import SH, RDF, RDFS, XSD, OWL
+    namespace_manager = graph.namespace_manager
+    for prefix, namespace in (("sh", SH), ("rdf", RDF), ("rdfs", RDFS), ("xsd", XSD), ("owl", OWL)):
+        namespace_manager.bind(prefix, namespace, override=False, replace=False)
+    for predicate in set(graph.predicates()) | {RDF.type}:
+        try:
+            namespace_manager.compute_qname(str(predicate), generate=True)
+        except ValueError:
+            # No qname for this IRI, the serializer writes it in full
+            continue
+
+def _do_convert(args):
+    if not os.path.exists(args.XSD_FILE):
+        _command_error("convert", f"XSD path {args.XSD_FILE!r} does not exist")
+    if os.path.isdir(args.XSD_FILE):
+        with os.scandir(args.XSD_FILE) as it:
+            xsd_files = sorted(entry.path for entry in it if entry.is_file() and entry.name.endswith(".xsd"))
+        if args.SHACL_OUTPUT_PATH:
+            os.makedirs(args.SHACL_OUTPUT_PATH, exist_ok=True)
+            shacl_files = [os.path.join(args.SHACL_OUTPUT_PATH, os.path.basename(x) + ".shape.ttl") for x in xsd_files]
         else:
-            rml_path = [args.RML_PATH + "/" + i for i in os.listdir(args.RML_PATH)]
+            shacl_files = [None] * len(xsd_files)
+    else:
+        xsd_files = [args.XSD_FILE]
+        shacl_files = [args.SHACL_OUTPUT_PATH]
+
+    # The files are independent, so a directory is spread over processes instead of one CLI call per file
+    if len(xsd_files) > 1 and args.WORKERS > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=args.WORKERS) as executor:
+            list(executor.map(convert_xsd, xsd_files, shacl_files, [args.STORE] * len(xsd_files)))
+    else:
+        for xsd_file, shacl_file in zip(xsd_files, shacl_files):
+            convert_xsd(xsd_file, shacl_file, args.STORE)
 
-        adj.loadMapping(args.SHACL_FILE, rml_path)
-        print("##### Start adjust SHACL shape")
-        SHACL_g = adj.adjust()
-        SHACL_g.serialize(destination=destination_path, format='turtle')
-        print("##### Saved adjusted SHACL shape to: " + destination_path)
+def _do_adjust(args):
+    # Fail on missing inputs before rdflib and the adjusters are imported
+    if not os.path.exists(args.RML_PATH):
+        _command_error("adjust", f"RML path {args.RML_PATH!r} does not exist")
+    if not os.path.isfile(args.SHACL_INPUT_PATH):
+        _command_error("adjust", f"SHACL file {args.SHACL_INPUT_PATH!r} does not exist")
+    # Shapes emitted as Jelly by a previous adjustment are read back without the Turtle parser
+    input_format = "jelly" if args.SHACL_INPUT_PATH.endswith(".jelly") else "ttl"
+    if "jelly" in (args.FORMAT, input_format):
+        # pyjelly can be importable while its rdflib plugins are not, e.g. with rdflib older than 7.1.4
+        from rdflib.parser import Parser
+        from rdflib.serializer import Serializer
+        from .utils import plugin_available
+        kinds = [kind for fmt, kind in ((input_format, Parser), (args.FORMAT, Serializer)) if fmt == "jelly"]
+        if not all(plugin_available("jelly", kind) for kind in kinds):
+            raise SystemExit("Jelly input and output require pyjelly and rdflib>=7.1.4, install them with: pip install xsd2shacl[jelly]")
+
+    extension = FORMAT_EXTENSIONS[args.FORMAT]
+    if args.ADJUSTED_PATH:
+        destination_path = args.ADJUSTED_PATH
+    else:
+        # Named after the mapping file without its .ttl extension, or after the mapping directory
+        base = os.path.basename(args.RML_PATH.rstrip("/\\"))
+        stem = os.path.splitext(base)[0] if base.lower().endswith(".ttl") else base
+        destination_path = f"{args.SHACL_INPUT_PATH}.{stem}.adjustment.{extension}"
+
+    if os.path.isdir(args.RML_PATH):
+        rml_path = list_mapping_files(args.RML_PATH, args.CACHE_LISTING)
+        # Without any mapping, every shape would be dropped as not adjusted
+        if not rml_path:
+            _command_error("adjust", f"RML directory {args.RML_PATH!r} has no .ttl mapping files")
+    else:
+        # A single mapping file is passed as a one-item list, whatever the case of its extension
+        rml_path = [args.RML_PATH]
+
+    adj = load_adjuster(args.RML_PATH)(args.STORE)
+
+    print("##### Start load SHACL shape")
+
+    # Parsed once here into the chosen store, the adjuster works on this graph directly
+    from .utils import create_graph
+    shacl_g = create_graph(args.STORE).parse(args.SHACL_INPUT_PATH, format=input_format)
+    # The mappings of each parsed file are applied batch by batch, then released
+    for mapping_dict in adj.iterMappings(shacl_g, rml_path, batch_size=args.BATCH_SIZE):
+        adj.apply(mapping_dict)
+    print("##### Start adjust SHACL shape")
+    SHACL_g = adj.finalize()
+    if args.FORMAT == "turtle":
+        prime_qnames(SHACL_g)
+    # rdflib writes N-Triples one line per triple, without holding the serialized output in memory
+    with open_destination(destination_path, SHACL_g) as f:
+        SHACL_g.serialize(destination=f, format=args.FORMAT)
+    print("##### Saved adjusted SHACL shape to: " + destination_path)
+
+if __name__ == "__main__":
+
+    args = define_args()
 
+    # The converters pull in rdflib and pyshacl, each command imports only what it needs
+    command = {"convert": _do_convert, "adjust": _do_adjust}[args.command]
+    if args.PROFILE:
+        # The trace is only written once the command has run, so its directory is checked up front
+        profile_dir = os.path.dirname(args.PROFILE) or "."
+        if not os.path.isdir(profile_dir) or not os.access(profile_dir, os.W_OK) or os.path.isdir(args.PROFILE):
+            _command_error(args.command, f"cannot write the profile to {args.PROFILE!r}")
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            command(args)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(args.PROFILE)
+            print("##### Saved profile to: " + args.PROFILE)
+    else:
+        command(args)
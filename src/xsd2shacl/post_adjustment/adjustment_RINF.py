@@ -1,16 +1,20 @@
 from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.parser import Parser
 from rdflib.plugins.sparql import prepareQuery
 import os
 import re
 from .utils import clear_graph, update_graph
+from ..utils import create_graph, plugin_available
 
 class Adjustment_RINF:
-    def __init__(self):
+    def __init__(self, store="default"):
         """
         Adjust the vocabulary of SHACL shapes from the XSD against the vocabulary used in the relavant mapping file
         Input: SHACL shapes from XSD, RDF Mapping file
         Output: Adjusted SHACL shapes
+        store: rdflib store plugin holding the SHACL shapes, e.g. "Oxigraph" for a Rust-backed index
         """
+        self.store = store
         self.RR = Namespace("http://www.w3.org/ns/r2rml#")
         self.RML = Namespace("http://semweb.mmlab.be/ns/rml#")
         self.RDF = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
@@ -21,6 +25,9 @@ class Adjustment_RINF:
         self.mapping_dicts = []
         self.FnO_dict = {}
         self.parentTMs = {}
+        # Shapes of the SHACL graph before adjustment and the shapes kept by the applied mappings
+        self.shape_list = None
+        self.shape_adjusted = None
 
 
         self.query_yarrrml = prepareQuery("""
@@ -110,6 +117,24 @@ class Adjustment_RINF:
                     self.parentTMs[parentTM] = iterator
     
     def adjust(self):
+        for mapping_dict in self.mapping_dicts:
+            self.apply(mapping_dict)
+        return self.finalize()
+
+    def initShapes(self):
+        if self.shape_list is None:
+            # Collected once into a set, every membership test below is O(1)
+            self.shape_list = set(self.SHACL_g.subjects(self.RDF.type, self.SHACL.NodeShape))
+            self.shape_list.update(self.SHACL_g.subjects(self.RDF.type, self.SHACL.PropertyShape))
+            self.shape_adjusted = []
+
+    def apply(self, mapping_dict):
+        """
+        Adjust the SHACL shapes against the triples maps of one parsed mapping, finalize() then drops the shapes no mapping kept
+        """
+        self.initShapes()
+        shape_list = self.shape_list
+        shape_adjusted = self.shape_adjusted
 
         def clearNodeShape(g, sub, shape_list, shape_adjusted = [], targetClass = []):
             if sub in shape_list:
@@ -161,119 +186,136 @@ class Adjustment_RINF:
             self.addExtraPS = sub
             return g, shape_adjusted
 
-        shape_list = []
-        for s, p, o in self.SHACL_g.triples((None, self.RDF.type, self.SHACL.NodeShape)):
-            shape_list.append(s)
-        for s, p, o in self.SHACL_g.triples((None, self.RDF.type, self.SHACL.PropertyShape)):
-            shape_list.append(s)
-
-
         NStemplate = "http://example.com/NodeShape"
         PStemplate = "http://example.com/PropertyShape"
-        shape_adjusted = []
-        for mapping_dict in self.mapping_dicts:
-            for m in mapping_dict:
+        for m in mapping_dict:
+            iterator = mapping_dict[m]["iterator"]
+            targetClass = mapping_dict[m]["targetClass"]
+            poms = mapping_dict[m]["pom"]
+                
+            sub = NStemplate+iterator.replace("//","/")
+            sub = URIRef(sub)
+            #self.SHACL_g, shape_adjusted = clearNodeShape(self.SHACL_g, sub, shape_list, shape_adjusted = shape_adjusted, targetClass = targetClass)
+            self.targetClassAdd = False
+            self.addExtraPS = False
+            self.datatype = False
+            for pom in poms:
                 iterator = mapping_dict[m]["iterator"]
-                targetClass = mapping_dict[m]["targetClass"]
-                poms = mapping_dict[m]["pom"]
-                    
-                sub = NStemplate+iterator.replace("//","/")
-                sub = URIRef(sub)
-                #self.SHACL_g, shape_adjusted = clearNodeShape(self.SHACL_g, sub, shape_list, shape_adjusted = shape_adjusted, targetClass = targetClass)
-                self.targetClassAdd = False
-                self.addExtraPS = False
-                self.datatype = False
-                for pom in poms:
-                    iterator = mapping_dict[m]["iterator"]
-                    predicate = pom[0]
-                    if predicate == "http://www.w3.org/2000/01/rdf-schema#label" or predicate ==None:
-                        continue
-                    if pom[2] == "IRI":
-                        self.correctKind = self.SHACL.IRI
-                    elif pom[2] == "Literal":
-                        self.correctKind = self.SHACL.Literal
-                    else:
-                        self.correctKind = False
-                    p = pom[1]
-                    if p.startswith("ParentTM"):
-                        p = p.split("ParentTM")[-1]
-                        iterator = ""
-                    NS_list = p.split("/")
-
-                    if pom[3] != None:
-                        self.datatype = pom[3]
-                    else:
-                        self.datatype = False
-
-                    NS_sub = URIRef(PStemplate+iterator+"/"+"/".join(NS_list))
+                predicate = pom[0]
+                if predicate == "http://www.w3.org/2000/01/rdf-schema#label" or predicate ==None:
+                    continue
+                if pom[2] == "IRI":
+                    self.correctKind = self.SHACL.IRI
+                elif pom[2] == "Literal":
+                    self.correctKind = self.SHACL.Literal
+                else:
+                    self.correctKind = False
+                p = pom[1]
+                if p.startswith("ParentTM"):
+                    p = p.split("ParentTM")[-1]
+                    iterator = ""
+                NS_list = p.split("/")
+
+                if pom[3] != None:
+                    self.datatype = pom[3]
+                else:
+                    self.datatype = False
+
+                NS_sub = URIRef(PStemplate+iterator+"/"+"/".join(NS_list))
+                if NS_sub in shape_list:
+                    self.SHACL_g, shape_adjusted = clearPropertyShape(self.SHACL_g, NS_sub, shape_list, predicate, shape_adjusted = shape_adjusted)
+                else:
+                    self.SHACL_g, shape_adjusted = addExtraPS(self.SHACL_g, predicate)
+
+
+                # For finding the minimum node shape to add targetClass 
+                for i in range(len(NS_list)-1):
+                    NS_sub = URIRef(NStemplate+iterator+"/"+"/".join(NS_list[0:i+1]))
                     if NS_sub in shape_list:
-                        self.SHACL_g, shape_adjusted = clearPropertyShape(self.SHACL_g, NS_sub, shape_list, predicate, shape_adjusted = shape_adjusted)
-                    else:
-                        self.SHACL_g, shape_adjusted = addExtraPS(self.SHACL_g, predicate)
-
-
-                    # For finding the minimum node shape to add targetClass 
-                    for i in range(len(NS_list)-1):
-                        NS_sub = URIRef(NStemplate+iterator+"/"+"/".join(NS_list[0:i+1]))
-                        if NS_sub in shape_list:
-                            self.targetClassAdd = URIRef(NS_sub)
-                            self.SHACL_g, shape_adjusted = clearNodeShape(self.SHACL_g, NS_sub, shape_list, shape_adjusted = shape_adjusted)
-                    if self.targetClassAdd != False:
-                        shape_adjusted.append(self.targetClassAdd)
-                        if targetClass != [None]:
-                            for c in targetClass:
-                                self.SHACL_g.add((URIRef(self.targetClassAdd),self.SHACL.targetClass,URIRef(c)))
-                        if self.addExtraPS != False:
-                            self.SHACL_g.add((URIRef(self.targetClassAdd),self.SHACL.property,self.addExtraPS))
-                            self.addExtraPS = False
-                        self.targetClassAdd = False
-                    else:
-                        self.SHACL_g, shape_adjusted = clearNodeShape(self.SHACL_g, sub, shape_list, shape_adjusted = shape_adjusted)
-                        shape_adjusted.append(sub)
-                        if targetClass != [None]:
-                            for c in targetClass:
-                                self.SHACL_g.add((URIRef(sub),self.SHACL.targetClass,URIRef(c)))
-                        if self.addExtraPS != False:
-                            self.SHACL_g.add((URIRef(sub),self.SHACL.property,self.addExtraPS))
-                            self.addExtraPS = False
-        
+                        self.targetClassAdd = URIRef(NS_sub)
+                        self.SHACL_g, shape_adjusted = clearNodeShape(self.SHACL_g, NS_sub, shape_list, shape_adjusted = shape_adjusted)
+                if self.targetClassAdd != False:
+                    shape_adjusted.append(self.targetClassAdd)
+                    if targetClass != [None]:
+                        for c in targetClass:
+                            self.SHACL_g.add((URIRef(self.targetClassAdd),self.SHACL.targetClass,URIRef(c)))
+                    if self.addExtraPS != False:
+                        self.SHACL_g.add((URIRef(self.targetClassAdd),self.SHACL.property,self.addExtraPS))
+                        self.addExtraPS = False
+                    self.targetClassAdd = False
+                else:
+                    self.SHACL_g, shape_adjusted = clearNodeShape(self.SHACL_g, sub, shape_list, shape_adjusted = shape_adjusted)
+                    shape_adjusted.append(sub)
+                    if targetClass != [None]:
+                        for c in targetClass:
+                            self.SHACL_g.add((URIRef(sub),self.SHACL.targetClass,URIRef(c)))
+                    if self.addExtraPS != False:
+                        self.SHACL_g.add((URIRef(sub),self.SHACL.property,self.addExtraPS))
+                        self.addExtraPS = False
+
+    def finalize(self):
+        self.initShapes()
         for s, p, o in self.SHACL_g.triples((None, self.RDF.nodeKind, self.SHACL.IRI)):
             g.remove((s, self.SHACL.datatype, None))
             g.remove((s, self.SHACL.minLength, None))
             g.remove((s, self.SHACL.maxLength, None))    
 
         
-        remove_subjects =[i for i in shape_list if i not in shape_adjusted]  
+        remove_subjects = self.shape_list.difference(self.shape_adjusted)
         self.SHACL_g = clear_graph(self.SHACL_g, remove_subjects)
+        self.shape_list = None
+        self.shape_adjusted = None
         return self.SHACL_g
         
     
-    def loadMapping(self, SHACL_g_path, mapping_path):
-        self.SHACL_g = Graph().parse(SHACL_g_path, format="ttl")
-        if mapping_path.endswith(".ttl"):
-            # Load the mapping file
-            print("######Start parsing mapping file: " + mapping_path)
-            g = Graph().parse(mapping_path, format="ttl")
-            for ns_prefix, namespace in g.namespaces():
-                self.SHACL_g.bind(ns_prefix, namespace, False)
-            self.parseParentTM(g)
-            self.parseFunction(g)
-            self.parseMapping(g, "yml" in mapping_path)
+    def loadShapes(self, SHACL_g_path, format="ttl"):
+        # The SHACL shapes are either a path or a graph the caller has already parsed
+        if isinstance(SHACL_g_path, Graph):
+            self.SHACL_g = SHACL_g_path
         else:
-            # Load the mapping file from the directory
-            for file in os.listdir(mapping_path):
-                if file.endswith(".ttl"):
-                    print("######Start parsing mapping file: " + file)
-                    g = Graph().parse(mapping_path + "/" + file, format="ttl")
-                    for ns_prefix, namespace in g.namespaces():
-                        self.SHACL_g.bind(ns_prefix, namespace, False)
-                    self.parseParentTM(g)
-                    self.parseFunction(g)
-                    self.parseMapping(g, "yml" in file)
-        # print(self.mapping_dicts)
-        # print(self.FnO_dict)
-            
-    
+            if format == "jelly" and not plugin_available("jelly", Parser):
+                raise ImportError("Jelly input requires pyjelly and rdflib>=7.1.4, install them with: pip install xsd2shacl[jelly]")
+            self.SHACL_g = create_graph(self.store).parse(SHACL_g_path, format=format)
+
+    def mappingFiles(self, mapping_path):
+        # The given mapping files, a mapping file, or the mapping files of a directory
+        if isinstance(mapping_path, list):
+            return mapping_path
+        elif mapping_path.endswith(".ttl"):
+            return [mapping_path]
+        else:
+            return [mapping_path + "/" + file for file in os.listdir(mapping_path) if file.endswith(".ttl")]
+
+    def parseMappingFile(self, p):
+        print("######Start parsing mapping file: " + p)
+        g = Graph().parse(p, format="ttl")
+        for ns_prefix, namespace in g.namespaces():
+            self.SHACL_g.bind(ns_prefix, namespace, False)
+        self.parseParentTM(g)
+        self.parseFunction(g)
+        self.parseMapping(g, "yml" in os.path.basename(p))
+
+    def loadMapping(self, SHACL_g_path, mapping_path, format="ttl"):
+        self.loadShapes(SHACL_g_path, format)
+        for p in self.mappingFiles(mapping_path):
+            self.parseMappingFile(p)
+
+    def iterMappings(self, SHACL_g_path, mapping_path, format="ttl", batch_size=32):
+        """
+        Like loadMapping, but yield the mappings of each mapping file as soon as it is parsed,
+        in batches of batch_size triples maps
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        self.loadShapes(SHACL_g_path, format)
+        for p in self.mappingFiles(mapping_path):
+            self.parseMappingFile(p)
+            parsed, self.mapping_dicts = self.mapping_dicts, []
+            for mapping_dict in parsed:
+                triples_maps = list(mapping_dict.items())
+                for start in range(0, len(triples_maps), batch_size):
+                    yield dict(triples_maps[start:start + batch_size])
+
     def parseMapping(self, g, yarrrml = False):
         mapping_dict = {}
         if yarrrml == True: